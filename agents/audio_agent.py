@@ -1,15 +1,191 @@
 import os
 import logging
+import concurrent.futures
+import copy
+import functools
+import glob
+import hashlib
+import importlib.util
 import numpy as np
 import torch
+import torchaudio
 import librosa
 import whisper
 from typing import Dict , Any , List , Optional , Tuple
-from transformers import pipeline
-from pydub import AudioSegment
+from transformers import AutoFeatureExtractor, pipeline
 
 logger=logging.getLogger(__name__)
 
+# Fixed input window (in samples) of the audio classifiers
+MODEL_INPUT_SAMPLES = 10000
+
+# File extensions treated as audio when scanning calibration directories
+AUDIO_EXTENSIONS = (".wav", ".flac", ".mp3", ".m4a", ".ogg")
+
+COUGH_CLASSES = ["normal", "covid", "pneumonia", "bronchitis"]
+BREATHING_CLASSES = ["normal", "wheezy", "crackle", "stridor", "rhonchi"]
+
+# Flat per-recording result layout for analyze_to_record; records from many
+# files can be np.stack-ed and summarized with vectorized NumPy operations
+RECORD_DTYPE = np.dtype([
+    ("cough_pred", "u1"),
+    ("cough_conf", "f4"),
+    ("cough_probs", "4f4"),
+    ("breath_pred", "u1"),
+    ("breath_probs", "5f4"),
+    ("voice_tremor", "f4"),
+    ("voice_hoarseness", "f4"),
+    ("voice_clarity", "f4"),
+    ("mfcc", "13f4"),
+    ("centroid", "f4"),
+    ("tempo", "f4"),
+])
+# Value of cough_pred / breath_pred when the classifier is not loaded; float
+# fields that were not computed are NaN so nan-aware reductions skip them
+NO_PREDICTION = 255
+
+EMOTION_MODEL_ID = "ehcalabres/wav2vec2-lg-xlsr-en-speech-emotion-recognition"
+
+
+@functools.lru_cache(maxsize=4)
+def _get_whisper(backend: str, model_size: str, device: str):
+    """Load a Whisper model once per (backend, size, device) and share it across AudioAgent instances"""
+    if backend == "faster":
+        from faster_whisper import WhisperModel
+        return WhisperModel(
+            model_size,
+            device=device,
+            compute_type="int8_float16" if device == "cuda" else "int8"
+        )
+    return whisper.load_model(model_size, device=device)
+
+
+@functools.lru_cache(maxsize=4)
+def _get_emotion_pipeline(model_id: str, device=None, batch_size: int = 1):
+    """Load the emotion audio-classification pipeline once per (model, device, batch size)"""
+    return pipeline(
+        "audio-classification",
+        model=model_id,
+        feature_extractor=AutoFeatureExtractor.from_pretrained(model_id),
+        device=device,
+        batch_size=batch_size
+    )
+
+
+@functools.lru_cache(maxsize=4)
+def _get_onnx_session(onnx_path: str, device: str, trt_cache_path: str):
+    """Create an ONNX Runtime session once per (graph, device) and share it across AudioAgent instances"""
+    import onnxruntime
+
+    providers = ["CPUExecutionProvider"]
+    if device == "cuda":
+        providers = [
+            ("TensorrtExecutionProvider", {
+                "trt_fp16_enable": True,
+                # Reuse built TensorRT engines instead of rebuilding them per session
+                "trt_engine_cache_enable": True,
+                "trt_engine_cache_path": trt_cache_path,
+            }),
+            "CUDAExecutionProvider"
+        ] + providers
+    available = onnxruntime.get_available_providers()
+    providers = [p for p in providers if (p[0] if isinstance(p, tuple) else p) in available]
+
+    return onnxruntime.InferenceSession(onnx_path, providers=providers)
+
+
+class SharedAudioTrunk(torch.nn.Module):
+    """Conv1d feature stack shared by every classifier head trained on the same conv weights"""
+
+    LAYERS = ("conv1", "conv2")
+
+    def __init__(self):
+        super(SharedAudioTrunk, self).__init__()
+        self.conv1 = torch.nn.Conv1d(1, 64, kernel_size=10, stride=5)
+        self.conv2 = torch.nn.Conv1d(64, 128, kernel_size=10, stride=5)
+
+    def forward(self, x):
+        x = torch.nn.functional.max_pool1d(torch.nn.functional.relu(self.conv1(x)), 2)
+        x = torch.nn.functional.max_pool1d(torch.nn.functional.relu(self.conv2(x)), 2)
+        return x
+
+
+class CoughHead(torch.nn.Module):
+    """Cough classifier head over (B, 128, 99) trunk features"""
+
+    def __init__(self):
+        super(CoughHead, self).__init__()
+        self.flatten = torch.nn.Flatten()
+        self.fc1 = torch.nn.Linear(128 * 99, 128)  
+        self.fc2 = torch.nn.Linear(128, 64)
+        self.fc3 = torch.nn.Linear(64, 4) 
+        self.relu = torch.nn.ReLU()
+
+    def forward(self, x):
+        x = self.flatten(x)
+        x = self.relu(self.fc1(x))
+        x = self.relu(self.fc2(x))
+        x = self.fc3(x)
+        return x
+
+
+class BreathingHead(torch.nn.Module):
+    """Breathing pattern head over (B, 128, 99) trunk features"""
+
+    def __init__(self):
+        super(BreathingHead, self).__init__()
+        self.flatten = torch.nn.Flatten()
+        self.fc1 = torch.nn.Linear(128 * 99, 128)
+        self.fc2 = torch.nn.Linear(128, 64)
+        self.fc3 = torch.nn.Linear(64, 5)
+        self.relu = torch.nn.ReLU()
+
+    def forward(self, x):
+        x = self.flatten(x)
+        x = self.relu(self.fc1(x))
+        x = self.relu(self.fc2(x))
+        x = self.fc3(x)
+        return x
+
+
+class VoiceHead(torch.nn.Module):
+    """Voice characteristics head over (B, 128, 99) trunk features"""
+
+    def __init__(self):
+        super(VoiceHead, self).__init__()
+        self.lstm = torch.nn.LSTM(128, 64, batch_first=True, bidirectional=True)
+        self.fc = torch.nn.Linear(128, 3)  # 3 outputs: tremor, hoarseness, clarity
+
+    def forward(self, x):
+        x = x.permute(0, 2, 1)  # Reshape for LSTM
+        x, _ = self.lstm(x)
+        x = x[:, -1, :]  # Take the last output
+        x = self.fc(x)
+        return x
+
+
+class AudioClassifierBundle(torch.nn.Module):
+    """Audio trunks and classifier heads as one graph, used for ONNX export"""
+
+    def __init__(self, trunks, heads, head_trunks):
+        super(AudioClassifierBundle, self).__init__()
+        self.trunks = torch.nn.ModuleList(trunks)
+        self.heads = torch.nn.ModuleDict(heads)
+        self.head_trunks = [head_trunks[name] for name in heads]
+
+    def forward(self, x):
+        features = [trunk(x) for trunk in self.trunks]
+        return tuple(head(features[i]) for head, i in zip(self.heads.values(), self.head_trunks))
+
+
+# Classifier heads over an audio trunk: config model name -> (head class, description)
+CLASSIFIER_HEADS = {
+    "cough_classifier": (CoughHead, "Cough classifier"),
+    "breathing_analyzer": (BreathingHead, "Breathing analyzer"),
+    "voice_analyzer": (VoiceHead, "Voice analyzer"),
+}
+
+
 class AudioAgent:
     """
     Agent responsible for processing and analyzing audio inputs 
@@ -27,145 +203,434 @@ class AudioAgent:
         """
         self.config=config
         self.device=torch.device("cuda" if torch.cuda.is_available() and config.get("use_gpu",True) else "cpu")
+        if self.device.type == "cuda":
+            # The classifier input shape is fixed, so cuDNN autotuning pays off
+            torch.backends.cudnn.benchmark=True
+        else:
+            self._configure_cpu_threads()
         self.sample_rate=config.get("sample_rate",16000)
         self.models={}
 
+        if config.get("precision") == "bf16":
+            self.model_dtype=torch.bfloat16
+        elif self.device.type == "cuda":
+            self.model_dtype=torch.float16
+        else:
+            self.model_dtype=torch.float32
+
+        # Persistent classifier input, reused across analyze() calls
+        self._model_input=torch.zeros(1,1,MODEL_INPUT_SAMPLES,device=self.device,dtype=self.model_dtype)
+        self._host_input=torch.zeros(MODEL_INPUT_SAMPLES,dtype=torch.float32)
+        if self.device.type == "cuda":
+            self._host_input=self._host_input.pin_memory()
+
+        self._io_pool=concurrent.futures.ThreadPoolExecutor(max_workers=config.get("io_workers",2))
+
+        self._init_feature_transforms()
+
         whisper_model_size=config.get("whisper_model_size","base")
-        self.whisper_model=whisper.load_model(whisper_model_size,device=self.device)
+        self.whisper_backend=config.get("whisper_backend","faster")
+        self.whisper_model=_get_whisper(self.whisper_backend,whisper_model_size,self.device.type)
 
         self._load_models()
 
         logger.info(f"AudioAgent initialized pn {self.device} with Whisper {whisper_model_size}")
 
-    
+
+    def _configure_cpu_threads(self):
+        """
+        Size the intra-op thread pool for CPU inference. Each of the
+        APP_WORKERS server worker processes gets cpu_count / APP_WORKERS
+        threads rather than one per core, which would oversubscribe the
+        machine; config["num_threads"] overrides the computed value.
+        """
+        workers=max(1,int(os.environ.get("APP_WORKERS","1")))
+        num_threads=self.config.get("num_threads") or max(1,(os.cpu_count() or 2)//workers)
+
+        torch.set_num_threads(num_threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # Can only be set once per process, before any parallel work
+            pass
+        torch.backends.mkldnn.enabled=True
+
+        logger.info(f"AudioAgent using {num_threads} CPU threads ({workers} worker(s))")
+
+    @classmethod
+    def clear_cache(cls):
+        """Drop the Whisper models, pipelines and ONNX sessions shared between AudioAgent instances"""
+        _get_whisper.cache_clear()
+        _get_emotion_pipeline.cache_clear()
+        _get_onnx_session.cache_clear()
+
+    def _init_feature_transforms(self):
+        """
+        Build the on-device transforms that share one STFT for all spectral
+        features. The mel filterbank, dB scaling and DCT match librosa's
+        defaults so MFCCs and centroids stay comparable with librosa output;
+        chroma skips librosa's per-clip tuning estimation.
+        """
+        n_fft=self.config.get("n_fft",2048)
+        n_mels=self.config.get("n_mels",128)
+        self.hop_length=self.config.get("hop_length",512)
+
+        self.spectrogram=torchaudio.transforms.Spectrogram(
+            n_fft=n_fft,
+            hop_length=self.hop_length,
+            power=2.0,
+            # Reflect padding fails on clips shorter than n_fft // 2 + 1; match librosa
+            pad_mode="constant"
+        ).to(self.device)
+        self.mel_scale=torchaudio.transforms.MelScale(
+            n_mels=n_mels,
+            sample_rate=self.sample_rate,
+            n_stft=n_fft // 2 + 1,
+            mel_scale="slaney",
+            norm="slaney"
+        ).to(self.device)
+        self.amplitude_to_db=torchaudio.transforms.AmplitudeToDB(stype="power",top_db=80.0).to(self.device)
+        self.dct_matrix=torchaudio.functional.create_dct(
+            self.config.get("n_mfcc",13),
+            n_mels,
+            norm="ortho"
+        ).to(self.device)
+        self.fft_frequencies=torch.linspace(0,self.sample_rate / 2,n_fft // 2 + 1,device=self.device)
+        self.chroma_filters=torch.from_numpy(
+            librosa.filters.chroma(sr=self.sample_rate,n_fft=n_fft)
+        ).float().to(self.device)
+
     def _load_models(self):
         """load the required audio models based on configuration"""
         model_configs=self.config.get("models",{})
 
+        # One trunk per distinct set of checkpoint conv weights; heads index into it
+        self.trunks=[SharedAudioTrunk().to(self.device,dtype=self.model_dtype).eval()]
+        self.head_trunks={}
+        self._trunk_seeded=False
+        self._head_streams={}
+        self._ort_session=None
+        # Checkpoint path each classifier head was loaded from, None if untrained
+        self._head_checkpoints={}
+
         for model_name, model_config in model_configs.items():
             try:
-                if model_name == "cough_classifier":
-                    self.models[model_name]=self._load_cough_classifier(model_config)
-
-                elif model_name == "breathing_analyzer":
-                    self.models[model_name]=self._load_breathing_analyzer(model_config)
-
-                elif model_name == "voice_analyzer":
-                    self.models[model_name]==self._load_voice_ananlyzer(model_config)
+                if model_name in CLASSIFIER_HEADS:
+                    model_path=model_config.get("model_path",f"models/audio_models/{model_name}.pt")
+                    self.models[model_name]=self._load_static_classifier(model_name,model_path)
+                    self._head_checkpoints[model_name]=model_path if os.path.exists(model_path) else None
 
                 elif model_name == "emotion_detector":
-                    self.models[model_name]== pipeline(
-                        "audio-classification",
-                         model="ehcalabres/wav2vec2-lg-xlsr-en-speech-emotion-recognition"
+                    self.models[model_name]=_get_emotion_pipeline(
+                        EMOTION_MODEL_ID,
+                        device=0 if self.device.type == "cuda" else -1,
+                        batch_size=self.config.get("hf_batch",1)
                     )
 
                 logger.info(f"Successfully loaded audio model: {model_name}")
             except Exception as e:
                 logger.error(f"Failed to load audio model {model_name}: {str(e)}") 
 
+        if self.config.get("use_onnxruntime",False):
+            self._init_onnx_session()
 
-    def _load_cough_classifier(self,config):
-        """load cough sound classifier model using PyTorch"""
-
-        model_path= config.get("model_path","models/audio_models/cough_classifier.pt")
-
-        class CoughClassifier(torch.nn.Module):
-            def __init__(self):
-                super(CoughClassifier, self).__init__()
-                self.conv1 = torch.nn.Conv1d(1, 64, kernel_size=10, stride=5)
-                self.pool = torch.nn.MaxPool1d(2)
-                self.conv2 = torch.nn.Conv1d(64, 128, kernel_size=10, stride=5)
-                self.flatten = torch.nn.Flatten()
-                self.fc1 = torch.nn.Linear(128 * 99, 128)  
-                self.fc2 = torch.nn.Linear(128, 64)
-                self.fc3 = torch.nn.Linear(64, 4) 
-                self.relu = torch.nn.ReLU()
-
-            def forward(self, x):
-                x = self.pool(self.relu(self.conv1(x)))
-                x = self.pool(self.relu(self.conv2(x)))
-                x = self.flatten(x)
-                x = self.relu(self.fc1(x))
-                x = self.relu(self.fc2(x))
-                x = self.fc3(x)
-                return x
-        model = CoughClassifier().to(self.device)
-        
+        if self._ort_session is None:
+            if self.device.type == "cpu" and self.config.get("int8",False):
+                self._quantize_models()
+                # Quantized modules are scripted rather than torch.compile-d
+                self._script_models()
+            elif self.config.get("compile_models",self.device.type == "cuda"):
+                self._compile_models()
 
-        if os.path.exists(model_path):
-            model.load_state_dict(torch.load(model_path, map_location=self.device))
-            model.eval()
-        else:
-            logger.warning(f"Cough classifier model not found at {model_path}. Using untrained model.")
-        
-        return model
+    def _quantize_models(self):
+        """
+        Quantize the audio models to INT8 for CPU inference: the Linear and
+        LSTM layers of the heads dynamically, and the conv trunk statically
+        using calibration clips from config["calibration_dir"]. The trunk
+        stays in float if no calibration audio is found.
+        """
+        if self.model_dtype != torch.float32:
+            logger.warning("INT8 quantization requires float32 audio models, skipping")
+            return
+
+        heads = {name: model for name, model in self.models.items() if name != "emotion_detector"}
+        try:
+            quantized_heads = {
+                name: torch.ao.quantization.quantize_dynamic(
+                    head,
+                    {torch.nn.Linear, torch.nn.LSTM},
+                    dtype=torch.qint8
+                )
+                for name, head in heads.items()
+            }
+        except Exception as e:
+            logger.warning(f"INT8 quantization failed for audio heads, keeping float models: {str(e)}")
+            return
+        self.models.update(quantized_heads)
+
+        calibration_dir = self.config.get("calibration_dir", "models/audio_models/calib")
+        calibration_paths = sorted(
+            path for path in glob.glob(os.path.join(calibration_dir, "*"))
+            if path.lower().endswith(AUDIO_EXTENSIONS)
+        )
+        if not calibration_paths:
+            logger.warning(f"No calibration audio found in {calibration_dir}. Keeping float audio trunk.")
+            return
+
+        windows = []
+        for calibration_path in calibration_paths:
+            if len(windows) >= self.config.get("calibration_samples", 8):
+                break
+            try:
+                audio = self.preprocess_audio(calibration_path)
+            except Exception:
+                logger.warning(f"Skipping calibration clip {calibration_path} that failed to decode")
+                continue
+            window = np.zeros(MODEL_INPUT_SAMPLES, dtype=np.float32)
+            n_samples = min(audio.shape[0], MODEL_INPUT_SAMPLES)
+            window[:n_samples] = audio[:n_samples]
+            windows.append(torch.from_numpy(window).view(1, 1, -1))
+
+        if not windows:
+            logger.warning(f"No decodable calibration audio in {calibration_dir}. Keeping float audio trunk.")
+            return
+
+        try:
+            engine = "onednn" if "onednn" in torch.backends.quantized.supported_engines else torch.backends.quantized.engine
+            torch.backends.quantized.engine = engine
+
+            quantized_trunks = []
+            for trunk in self.trunks:
+                trunk = torch.ao.quantization.QuantWrapper(copy.deepcopy(trunk)).eval()
+                trunk.qconfig = torch.ao.quantization.get_default_qconfig(engine)
+                torch.ao.quantization.prepare(trunk, inplace=True)
+                with torch.no_grad():
+                    for window in windows:
+                        trunk(window)
+                torch.ao.quantization.convert(trunk, inplace=True)
+                quantized_trunks.append(trunk)
+        except Exception as e:
+            logger.warning(f"INT8 quantization failed for audio trunk, keeping float trunk: {str(e)}")
+            return
+
+        self.trunks = quantized_trunks
+        logger.info(f"Quantized audio models to INT8 ({engine}, {len(windows)} calibration clips)")
+
+    def _init_onnx_session(self):
+        """
+        Create an ONNX Runtime session running the trunks and all classifier
+        heads, exporting the graph first if it is not on disk yet. The file
+        name is keyed on the checkpoints and precision, so retrained weights
+        are re-exported. Untrained heads are never exported. Leaves the
+        PyTorch models in use if onnxruntime is missing or fails.
+        """
+        heads = {name: model for name, model in self.models.items() if name != "emotion_detector"}
+        if not heads:
+            return
+
+        if importlib.util.find_spec("onnxruntime") is None:
+            logger.warning("onnxruntime not installed, using PyTorch audio models")
+            return
+
+        untrained = [name for name in heads if self._head_checkpoints.get(name) is None]
+        if untrained:
+            logger.warning(f"Not exporting untrained audio models to ONNX ({', '.join(untrained)}), using PyTorch")
+            return
+
+        onnx_dir = self.config.get("onnx_dir", "models/audio_models/onnx")
+        onnx_path = os.path.join(onnx_dir, f"{'_'.join(sorted(heads))}_{self._onnx_cache_key(heads)}.onnx")
+
+        try:
+            if not os.path.exists(onnx_path):
+                self._export_onnx(
+                    AudioClassifierBundle(self.trunks, heads, self.head_trunks),
+                    onnx_path,
+                    torch.zeros(1, 1, MODEL_INPUT_SAMPLES),
+                    list(heads)
+                )
+
+            trt_cache_path = os.path.join(onnx_dir, "trt_cache")
+            os.makedirs(trt_cache_path, exist_ok=True)
+            self._ort_session = _get_onnx_session(onnx_path, self.device.type, trt_cache_path)
+            self._ort_outputs = [output.name for output in self._ort_session.get_outputs()]
+            logger.info(f"Running audio models with ONNX Runtime ({', '.join(self._ort_session.get_providers())})")
+        except Exception as e:
+            self._ort_session = None
+            logger.warning(f"ONNX Runtime unavailable for audio models, using PyTorch: {str(e)}")
+
+    def _onnx_cache_key(self, heads) -> str:
+        """Hash of the model precision and each head checkpoint's path, size and mtime"""
+        digest = hashlib.sha1(str(self.model_dtype).encode())
+        for name in sorted(heads):
+            model_path = self._head_checkpoints[name]
+            stat = os.stat(model_path)
+            digest.update(f"{name}:{os.path.abspath(model_path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        return digest.hexdigest()[:12]
+
+    def _export_onnx(self, model, onnx_path, sample_input, output_names):
+        """Export a float32 CPU copy of model to onnx_path with a static input shape"""
+        os.makedirs(os.path.dirname(onnx_path), exist_ok=True)
+        export_model = copy.deepcopy(model).float().cpu().eval()
+        torch.onnx.export(
+            export_model,
+            sample_input,
+            onnx_path,
+            input_names=["input"],
+            output_names=output_names,
+            opset_version=17
+        )
+        logger.info(f"Exported audio models to {onnx_path}")
+
+    def _compile_models(self):
+        """
+        Compile the audio trunks and classifier heads with torch.compile and
+        run warm-up forwards so the first analyze() call does not pay the
+        compile cost. Falls back to eager modules if compilation fails.
+        """
+        heads = {name: model for name, model in self.models.items() if name != "emotion_detector"}
+        try:
+            trunks = [torch.compile(trunk, mode="reduce-overhead", fullgraph=True) for trunk in self.trunks]
+            compiled_heads = {
+                name: torch.compile(head, mode="reduce-overhead", fullgraph=True)
+                for name, head in heads.items()
+            }
+
+            dummy_input = torch.zeros(1, 1, MODEL_INPUT_SAMPLES, device=self.device, dtype=self.model_dtype)
+            with torch.inference_mode():
+                # reduce-overhead records its CUDA graphs on the second call
+                for _ in range(2):
+                    self._run_heads(compiled_heads, self._trunk_features(trunks, compiled_heads, dummy_input))
+        except Exception as e:
+            logger.warning(f"torch.compile unavailable for audio models, falling back to TorchScript: {str(e)}")
+            self._script_models()
+            return
+
+        self.trunks = trunks
+        self.models.update(compiled_heads)
+        logger.info(f"Compiled audio models: {len(trunks)} trunk(s), {', '.join(compiled_heads)}")
+
+    def _script_models(self):
+        """
+        Script the audio trunks and classifier heads with TorchScript and
+        specialize them with optimize_for_inference, which freezes the
+        weights as constants so conv and bias can be folded. Keeps the
+        eager modules if scripting fails.
+        """
+        heads = {name: model for name, model in self.models.items() if name != "emotion_detector"}
+        try:
+            trunks = [torch.jit.optimize_for_inference(torch.jit.script(trunk.eval())) for trunk in self.trunks]
+            scripted_heads = {
+                name: torch.jit.optimize_for_inference(torch.jit.script(head.eval()))
+                for name, head in heads.items()
+            }
+        except Exception as e:
+            logger.warning(f"TorchScript unavailable for audio models, using eager mode: {str(e)}")
+            return
+
+        self.trunks = trunks
+        self.models.update(scripted_heads)
+        logger.info(f"Scripted audio models: {len(trunks)} trunk(s), {', '.join(scripted_heads)}")
+
+
+    def _load_static_classifier(self, model_name, model_path):
+        """
+        Build a classifier head for the fixed (1, 1, MODEL_INPUT_SAMPLES)
+        input, load its checkpoint if present and record which trunk in
+        self.trunks it runs on
+
+        Args:
+            model_name: Key of the head in CLASSIFIER_HEADS
+            model_path: Path to the full classifier checkpoint
+
+        Returns:
+            The head module on self.device in self.model_dtype
+        """
+        head_cls, description = CLASSIFIER_HEADS[model_name]
+        model = head_cls().to(self.device,dtype=self.model_dtype)
+        self.head_trunks[model_name] = 0
 
-    def _load_breathing_analyzer(self,config):
-        """Load breathing pattern analyzer model"""
-
-        class BreathingAnalyzer(torch.nn.Module):
-            def __init__(self):
-                super(BreathingAnalyzer,self).__init__()
-                self.conv1 = torch.nn.Conv1d(1, 64, kernel_size=10, stride=5)
-                self.pool = torch.nn.MaxPool1d(2)
-                self.conv2 = torch.nn.Conv1d(64, 128, kernel_size=10, stride=5)
-                self.flatten = torch.nn.Flatten()
-                self.fc1 = torch.nn.Linear(128 * 99, 128)
-                self.fc2 = torch.nn.Linear(128, 64)
-                self.fc3 = torch.nn.Linear(64, 5)
-                self.relu = torch.nn.ReLU()
-            def forward(self, x):
-                x = self.pool(self.relu(self.conv1(x)))
-                x = self.pool(self.relu(self.conv2(x)))
-                x = self.flatten(x)
-                x = self.relu(self.fc1(x))
-                x = self.relu(self.fc2(x))
-                x = self.fc3(x)
-                return x
-        model = BreathingAnalyzer().to(self.device)
-        model_path = config.get("model_path", "models/audio_models/breathing_analyzer.pt")
-        
-        if os.path.exists(model_path):
-            model.load_state_dict(torch.load(model_path, map_location=self.device))
-            model.eval()
-        else:
-            logger.warning(f"Breathing analyzer model not found at {model_path}. Using untrained model.")
-            
-        return model
-    
-    def _load_voice_analyzer(self, config):
-        """Load voice characteristics analyzer model"""
-        model_path = config.get("model_path", "models/audio_models/voice_analyzer.pt")
-        
-        # Placeholder for a real model implementation
-        class VoiceAnalyzer(torch.nn.Module):
-            def __init__(self):
-                super(VoiceAnalyzer, self).__init__()
-                self.conv1 = torch.nn.Conv1d(1, 64, kernel_size=10, stride=5)
-                self.pool = torch.nn.MaxPool1d(2)
-                self.conv2 = torch.nn.Conv1d(64, 128, kernel_size=10, stride=5)
-                self.lstm = torch.nn.LSTM(128, 64, batch_first=True, bidirectional=True)
-                self.fc = torch.nn.Linear(128, 3)  # 3 outputs: tremor, hoarseness, clarity
-                
-            def forward(self, x):
-                x = self.pool(torch.nn.functional.relu(self.conv1(x)))
-                x = self.pool(torch.nn.functional.relu(self.conv2(x)))
-                x = x.permute(0, 2, 1)  # Reshape for LSTM
-                x, _ = self.lstm(x)
-                x = x[:, -1, :]  # Take the last output
-                x = self.fc(x)
-                return x
-                
-        model = VoiceAnalyzer().to(self.device)
-        
         if os.path.exists(model_path):
-            model.load_state_dict(torch.load(model_path, map_location=self.device))
+            self.head_trunks[model_name] = self._load_head_state(model, model_path)
             model.eval()
         else:
-            logger.warning(f"Voice analyzer model not found at {model_path}. Using untrained model.")
-            
+            logger.warning(f"{description} model not found at {model_path}. Using untrained model.")
+
         return model
 
+    def _load_head_state(self, head, model_path) -> int:
+        """
+        Load a full classifier checkpoint into a head module.
+
+        Checkpoints store the conv stack and the head layers together; the
+        conv weights go into a trunk and the remaining keys into the head.
+        Heads whose checkpoints have identical conv weights share a trunk;
+        a checkpoint with different conv weights gets a trunk of its own,
+        so every head runs on the features it was trained on.
+
+        Returns:
+            Index of the head's trunk in self.trunks
+        """
+        state_dict = torch.load(model_path, map_location=self.device)
+        trunk_state = {k: v for k, v in state_dict.items() if k.split(".", 1)[0] in SharedAudioTrunk.LAYERS}
+        head_state = {k: v for k, v in state_dict.items() if k not in trunk_state}
+
+        head.load_state_dict(head_state)
+        if not trunk_state:
+            return 0
+
+        for i, trunk in enumerate(self.trunks):
+            if i == 0 and not self._trunk_seeded:
+                continue
+            loaded_state = trunk.state_dict()
+            if all(
+                k in loaded_state and torch.equal(v.to(dtype=loaded_state[k].dtype), loaded_state[k])
+                for k, v in trunk_state.items()
+            ):
+                return i
+
+        if not self._trunk_seeded:
+            self.trunks[0].load_state_dict(trunk_state)
+            self._trunk_seeded = True
+            logger.info(f"Loaded audio trunk weights from {model_path}")
+            return 0
+
+        trunk = SharedAudioTrunk().to(self.device,dtype=self.model_dtype).eval()
+        trunk.load_state_dict(trunk_state)
+        self.trunks.append(trunk)
+        logger.info(f"Conv weights in {model_path} differ from the loaded audio trunks, giving it its own trunk")
+        return len(self.trunks) - 1
+
+    def _run_onnx(self) -> Dict[str, torch.Tensor]:
+        """Run the ONNX Runtime session on the staged host input"""
+        arrays = self._ort_session.run(self._ort_outputs, {"input": self._host_input.numpy()[None, None, :]})
+        return {name: torch.from_numpy(array) for name, array in zip(self._ort_outputs, arrays)}
+
+    def _trunk_features(self, trunks, heads: Dict[str, torch.nn.Module], x: torch.Tensor) -> Dict[int, torch.Tensor]:
+        """Run each trunk used by heads once on x, keyed by trunk index"""
+        return {i: trunks[i](x) for i in sorted({self.head_trunks[name] for name in heads})}
+
+    def _run_heads(self, heads: Dict[str, torch.nn.Module], features: Dict[int, torch.Tensor]) -> Dict[str, torch.Tensor]:
+        """
+        Run the classifier heads on the features of their trunks.
+
+        On CUDA each head is launched on its own stream so the small
+        kernels of the three heads can overlap.
+        """
+        if self.device.type != "cuda":
+            return {name: head(features[self.head_trunks[name]]) for name, head in heads.items()}
+
+        current_stream = torch.cuda.current_stream(self.device)
+        outputs = {}
+        for name, head in heads.items():
+            stream = self._head_streams.setdefault(name, torch.cuda.Stream(device=self.device))
+            stream.wait_stream(current_stream)
+            with torch.cuda.stream(stream):
+                outputs[name] = head(features[self.head_trunks[name]])
+
+        for name in outputs:
+            current_stream.wait_stream(self._head_streams[name])
+        return outputs
+
 
     def preprocess_audio(self, audio_path:str)->np.ndarray:
         """
@@ -179,23 +644,30 @@ class AudioAgent:
         """
 
         try :
-            if not audio_path.endswith('.wav'):
-                audio = AudioSegment.from_file(audio_path)
-                temp_path= audio_path.rsplit('.',1)[0]+'.wav'
-                audio.export(temp_path,format='wav')
-                audio_path=temp_path
+            # torchaudio's ffmpeg/sox backend decodes mp3/m4a/flac directly
+            wav, sr = torchaudio.load(audio_path)
+            if sr != self.sample_rate:
+                wav = torchaudio.functional.resample(wav, sr, self.sample_rate)
+            audio = wav.mean(dim=0).numpy()
 
-            audio, sr = librosa.load(audio_path, sr=self.sample_rate)
-
-            if self.config.get("normalize",True):
-                audio = librosa.util.normalize(audio)
+            if self.config.get("normalize",True) and audio.size:
+                # Peak-normalize in place; max/min avoid the temporary np.abs would allocate
+                peak = max(audio.max(), -audio.min())
+                if peak > 1e-8:
+                    audio *= 1.0 / peak
             
             if self.config.get("remove_silence",False):
                 non_silent_intervals=librosa.effects.split(
                     audio,
                     top_db=self.config.get("silence_thresold",30)
                 )
-                audio=np.concatenate([audio[start:end] for start,end in non_silent_intervals])
+                lengths=non_silent_intervals[:,1]-non_silent_intervals[:,0]
+                trimmed=np.empty(int(lengths.sum()),dtype=audio.dtype)
+                offset=0
+                for start,end in non_silent_intervals:
+                    trimmed[offset:offset+end-start]=audio[start:end]
+                    offset+=end-start
+                audio=trimmed
 
             return audio
         except Exception as e:
@@ -216,32 +688,72 @@ class AudioAgent:
 
         features={}
 
-        if self.config.get("extract_mfcc",True):
-            mfccs=librosa.feature.mfcc(
-                y=audio,
-                sr=self.sample_rate,
-                n_mfcc=self.config.get("n_mfcc",13)
-            )
-            features["mfcc"]=mfccs.mean(axis=1)
+        extract_mfcc=self.config.get("extract_mfcc",True)
+        extract_tempo=self.config.get("extract_tempo",False)
 
-        if self.config.get("external_spectral_centroid",True):
-            spectral_centroid=librosa.feature.spectral_centroid(
-                y=audio,
-                sr=self.sample_rate
-            )
-            features["spectral_centroid"]=spectral_centroid.mean()
+        with torch.inference_mode():
+            wav=self._to_device(audio)
+            power_spec=self.spectrogram(wav)
+
+            if extract_mfcc or extract_tempo:
+                log_mel=self.amplitude_to_db(self.mel_scale(power_spec))
 
-        if self.config.get("extract_chroma",True):
-            bandwidth=librosa.feature.chroma_stft(y=audio,sr=self.sample_rate)
-            features["bandwidth"]=bandwidth.mean()
+            if extract_mfcc:
+                mfccs=torch.matmul(log_mel.transpose(0,1),self.dct_matrix).transpose(0,1)
+                features["mfcc"]=mfccs.mean(dim=1).cpu().numpy()
 
-        if self.config.get("extract_tempo",True):
-            onset_env=librosa.onset.onset_strength(y=audio, sr=self.sample_rate)
-            tempo=librosa.beat.tempo(onset_envelope=onset_env, sr=self.sample_rate)
-            features["tempo"]=tempo[0]
+            if self.config.get("external_spectral_centroid",True):
+                magnitude=power_spec.sqrt()
+                spectral_centroid=(self.fft_frequencies[:,None]*magnitude).sum(dim=0)/magnitude.sum(dim=0).clamp_min(1e-10)
+                features["spectral_centroid"]=spectral_centroid.mean().item()
+
+            if self.config.get("extract_chroma",True):
+                chroma=torch.matmul(self.chroma_filters,power_spec)
+                chroma=chroma/chroma.amax(dim=0,keepdim=True).clamp_min(1e-10)
+                features["bandwidth"]=chroma.mean().item()
+
+            if extract_tempo:
+                features["tempo"]=self._estimate_tempo(log_mel)
 
         return features
 
+    def _estimate_tempo(self,log_mel:torch.Tensor,min_bpm:float=40.0,max_bpm:float=240.0)->float:
+        """
+        Estimate tempo from the autocorrelation of the onset envelope,
+        computed with an FFT pair on the log-mel spectrogram's device
+        
+        Args:
+            log_mel: Log-mel spectrogram of shape (n_mels, frames)
+            min_bpm: Slowest tempo considered
+            max_bpm: Fastest tempo considered
+            
+        Returns:
+            Tempo in beats per minute, or 0.0 if the clip is too short
+        """
+        onset_env=torchaudio.functional.compute_deltas(log_mel).clamp(min=0).mean(dim=0)
+        onset_env=onset_env-onset_env.mean()
+        n_frames=onset_env.shape[-1]
+
+        # Zero-pad to 2n so the circular correlation equals the linear one
+        spectrum=torch.fft.rfft(onset_env,n=2*n_frames)
+        autocorr=torch.fft.irfft(spectrum*spectrum.conj(),n=2*n_frames)[:n_frames]
+
+        frame_rate=self.sample_rate/self.hop_length
+        min_lag=int(np.ceil(60.0*frame_rate/max_bpm))
+        # Keep a neighbour on both sides of the peak for interpolation
+        max_lag=min(int(60.0*frame_rate/min_bpm),n_frames-2)
+        if min_lag>=max_lag:
+            return 0.0
+
+        lag=min_lag+torch.argmax(autocorr[min_lag:max_lag+1]).item()
+
+        # Parabolic interpolation around the peak for sub-frame lag resolution
+        before,peak,after=autocorr[lag-1:lag+2].tolist()
+        curvature=before-2*peak+after
+        if curvature<0:
+            lag+=0.5*(before-after)/curvature
+        return 60.0*frame_rate/lag
+
     def transcribe_audio(self, audio: np.ndarray) -> str:
         """
         Transcribe speech in audio using Whisper
@@ -258,12 +770,74 @@ class AudioAgent:
                 audio = audio.astype(np.float32)
                 
             # Use Whisper to transcribe
+            if self.whisper_backend == "faster":
+                segments, _ = self.whisper_model.transcribe(audio, beam_size=1, vad_filter=True)
+                return " ".join(segment.text.strip() for segment in segments)
+
             result = self.whisper_model.transcribe(audio)
             return result["text"]
         except Exception as e:
             logger.error(f"Error transcribing audio: {str(e)}")
             return ""
     
+    def transcribe_batch(self, audios: List[np.ndarray]) -> List[str]:
+        """
+        Transcribe several clips, running the Whisper encoder once per batch
+        of clips up to 30 s long; longer clips are transcribed individually.
+        Batching needs whisper_backend other than "faster" (the default);
+        with faster-whisper every clip is transcribed individually
+        
+        Args:
+            audios: List of audio arrays
+            
+        Returns:
+            Transcribed text for each clip, in input order
+        """
+        if self.whisper_backend == "faster":
+            # CTranslate2 models do not expose the encoder; transcribe per clip
+            return [self.transcribe_audio(audio) for audio in audios]
+
+        batch_size = self.config.get("whisper_batch_size", 8)
+        n_mels = self.whisper_model.dims.n_mels
+        fp16 = self.device.type == "cuda"
+        options = whisper.DecodingOptions(fp16=fp16, without_timestamps=True)
+        transcripts = [""] * len(audios)
+
+        # Only clips that fit in one 30 s window can share an encoder batch;
+        # longer ones go through transcribe_audio so nothing past 30 s is lost
+        short_indices = []
+        for i, audio in enumerate(audios):
+            if audio.shape[0] > whisper.audio.N_SAMPLES:
+                transcripts[i] = self.transcribe_audio(audio)
+            else:
+                short_indices.append(i)
+
+        for start in range(0, len(short_indices), batch_size):
+            batch_indices = short_indices[start:start + batch_size]
+            try:
+                mels = torch.stack([
+                    whisper.log_mel_spectrogram(
+                        whisper.pad_or_trim(audios[i].astype(np.float32, copy=False)),
+                        n_mels=n_mels
+                    )
+                    for i in batch_indices
+                ]).to(self.device)
+                if fp16:
+                    mels = mels.half()
+
+                with torch.inference_mode():
+                    audio_features = self.whisper_model.encoder(mels)
+                    # decode() skips the encoder when given encoded features
+                    decoded = whisper.decode(self.whisper_model, audio_features, options)
+            except Exception as e:
+                logger.error(f"Error transcribing audio batch {start // batch_size}: {str(e)}")
+                continue
+
+            for i, result in zip(batch_indices, decoded):
+                transcripts[i] = result.text
+
+        return transcripts
+
     def analyze(self, audio_path: str) -> Dict[str, Any]:
         """
         Analyze audio file and return comprehensive results
@@ -274,65 +848,253 @@ class AudioAgent:
         Returns:
             Dictionary with analysis results
         """
-        results = {}
-        
         try:
-
             audio = self.preprocess_audio(audio_path)
+        except Exception as e:
+            logger.error(f"Error analyzing audio: {str(e)}")
+            return {"error": str(e)}
+
+        return self._analyze_audio(audio, audio_path)
+
+    def analyze_many(self, audio_paths: List[str]) -> List[Dict[str, Any]]:
+        """
+        Analyze several audio files, decoding the next file on a background
+        I/O worker while the current one goes through feature extraction,
+        transcription and the classifiers
+        
+        Args:
+            audio_paths: Paths to audio files
             
+        Returns:
+            List of analysis results, in the same order as audio_paths
+        """
+        results = []
+        if not audio_paths:
+            return results
 
+        pending = self._io_pool.submit(self.preprocess_audio, audio_paths[0])
+        for i, audio_path in enumerate(audio_paths):
+            current = pending
+            if i + 1 < len(audio_paths):
+                pending = self._io_pool.submit(self.preprocess_audio, audio_paths[i + 1])
+
+            try:
+                audio = current.result()
+            except Exception as e:
+                logger.error(f"Error analyzing audio: {str(e)}")
+                results.append({"error": str(e)})
+                continue
+
+            results.append(self._analyze_audio(audio, audio_path))
+
+        return results
+
+    def analyze_batch(self, audio_paths: List[str]) -> List[Dict[str, Any]]:
+        """
+        Analyze several audio files, transcribing them together with
+        transcribe_batch
+        
+        Args:
+            audio_paths: Paths to audio files
+            
+        Returns:
+            List of analysis results, in the same order as audio_paths
+        """
+        results = [None] * len(audio_paths)
+        audios = {}
+
+        futures = [self._io_pool.submit(self.preprocess_audio, audio_path) for audio_path in audio_paths]
+        for i, future in enumerate(futures):
+            try:
+                audios[i] = future.result()
+            except Exception as e:
+                logger.error(f"Error analyzing audio: {str(e)}")
+                results[i] = {"error": str(e)}
+
+        transcripts = {}
+        if self.config.get("transcribe", True) and audios:
+            if self.whisper_backend == "faster":
+                logger.info("faster-whisper backend does not batch encoder passes, transcribing clips individually")
+            indices = list(audios)
+            transcripts = dict(zip(indices, self.transcribe_batch([audios[i] for i in indices])))
+
+        emotions = {}
+        if "emotion_detector" in self.models and audios:
+            indices = list(audios)
+            try:
+                # The pipeline batches the list with its configured batch_size
+                emotion_results = self.models["emotion_detector"]([self._emotion_input(audios[i]) for i in indices])
+                emotions = dict(zip(indices, emotion_results))
+            except Exception as e:
+                logger.error(f"Error running emotion detection on audio batch: {str(e)}")
+
+        for i, audio in audios.items():
+            results[i] = self._analyze_audio(
+                audio,
+                audio_paths[i],
+                transcript=transcripts.get(i),
+                emotion_result=emotions.get(i)
+            )
+
+        return results
+
+    def _emotion_input(self, audio: np.ndarray) -> np.ndarray:
+        """
+        Decoded audio at the emotion model's sampling rate, so the pipeline
+        does not re-read the file. A bare array is used because dict inputs
+        with a sampling rate are not accepted by older transformers releases.
+        """
+        target_rate = self.models["emotion_detector"].feature_extractor.sampling_rate
+        if target_rate != self.sample_rate:
+            audio = torchaudio.functional.resample(torch.from_numpy(audio), self.sample_rate, target_rate).numpy()
+        return audio
+
+    def _to_device(self, audio: np.ndarray) -> torch.Tensor:
+        """Copy an audio array to self.device as float32"""
+        return torch.from_numpy(np.ascontiguousarray(audio, dtype=np.float32)).to(self.device)
+
+    def _analyze_audio(
+        self,
+        audio: np.ndarray,
+        audio_path: str,
+        transcript: Optional[str] = None,
+        emotion_result: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run feature extraction, transcription and the audio models on
+        preprocessed audio
+        
+        Args:
+            audio: Preprocessed audio array
+            audio_path: Path the audio was loaded from
+            transcript: Precomputed transcript; transcribed here if None
+            emotion_result: Precomputed emotion_detector output; computed here if None
+            
+        Returns:
+            Dictionary with analysis results
+        """
+        results = {}
+        
+        try:
             features = self.extract_features(audio)
             results["features"] = features
             
 
             if self.config.get("transcribe", True):
-                transcript = self.transcribe_audio(audio)
+                if transcript is None:
+                    transcript = self.transcribe_audio(audio)
                 results["transcript"] = transcript
             
 
-            for model_name, model in self.models.items():
-                if model_name == "emotion_detector":
-
-                    emotion_result = model(audio_path)
-                    results[model_name] = emotion_result
-                else:
-
-                    with torch.no_grad():
-                        model_input = torch.tensor(audio).float().unsqueeze(0).unsqueeze(0)
-                        if len(model_input) > 10000: 
-                            model_input = model_input[:, :, :10000]
-                        
-
-                        output = model(model_input.to(self.device))
-                        if model_name == "cough_classifier":
-                            classes = ["normal", "covid", "pneumonia", "bronchitis"]
-                            probs = torch.nn.functional.softmax(output, dim=1)[0]
-                            class_idx = torch.argmax(probs).item()
-                            results[model_name] = {
-                                "prediction": classes[class_idx],
-                                "confidence": probs[class_idx].item(),
-                                "probabilities": {cls: prob.item() for cls, prob in zip(classes, probs)}
-                            }
-                        elif model_name == "breathing_analyzer":
-                            classes = ["normal", "wheezy", "crackle", "stridor", "rhonchi"]
-                            probs = torch.nn.functional.softmax(output, dim=1)[0]
-                            class_idx = torch.argmax(probs).item()
-                            results[model_name] = {
-                                "prediction": classes[class_idx],
-                                "confidence": probs[class_idx].item(),
-                                "probabilities": {cls: prob.item() for cls, prob in zip(classes, probs)}
-                            }
-                        elif model_name == "voice_analyzer":
-                            output = output[0].cpu().numpy()
-                            results[model_name] = {
-                                "tremor": float(output[0]),
-                                "hoarseness": float(output[1]),
-                                "clarity": float(output[2])
-                            }
+            outputs = self._run_classifiers(audio)
+            for model_name, output in outputs.items():
+                if model_name == "cough_classifier":
+                    probs = self._class_probabilities(output)
+                    class_idx = int(np.argmax(probs))
+                    results[model_name] = {
+                        "prediction": COUGH_CLASSES[class_idx],
+                        "confidence": probs[class_idx],
+                        "probabilities": dict(zip(COUGH_CLASSES, probs))
+                    }
+                elif model_name == "breathing_analyzer":
+                    probs = self._class_probabilities(output)
+                    class_idx = int(np.argmax(probs))
+                    results[model_name] = {
+                        "prediction": BREATHING_CLASSES[class_idx],
+                        "confidence": probs[class_idx],
+                        "probabilities": dict(zip(BREATHING_CLASSES, probs))
+                    }
+                elif model_name == "voice_analyzer":
+                    tremor, hoarseness, clarity = output[0].float().tolist()
+                    results[model_name] = {
+                        "tremor": tremor,
+                        "hoarseness": hoarseness,
+                        "clarity": clarity
+                    }
+
+            if "emotion_detector" in self.models:
+                if emotion_result is None:
+                    emotion_result = self.models["emotion_detector"](self._emotion_input(audio))
+                results["emotion_detector"] = emotion_result
             
             return results
             
         except Exception as e:
             logger.error(f"Error analyzing audio: {str(e)}")
             results["error"] = str(e)
-            return results
\ No newline at end of file
+            return results
+
+    def analyze_to_record(self, audio_path: str) -> np.ndarray:
+        """
+        Analyze audio file into a single RECORD_DTYPE record instead of
+        nested dictionaries. Transcription and emotion detection are not
+        part of the record and are skipped.
+        
+        Args:
+            audio_path: Path to audio file
+            
+        Returns:
+            0-d structured array of dtype RECORD_DTYPE. Values that were
+            not computed (classifier not loaded, feature disabled, or the
+            file failed to decode or analyze) are NO_PREDICTION / NaN
+        """
+        record = np.zeros((), dtype=RECORD_DTYPE)
+        for name in RECORD_DTYPE.names:
+            record[name] = np.nan if RECORD_DTYPE[name].base.kind == "f" else NO_PREDICTION
+
+        try:
+            audio = self.preprocess_audio(audio_path)
+            features = self.extract_features(audio)
+            outputs = self._run_classifiers(audio)
+        except Exception as e:
+            logger.error(f"Error analyzing audio: {str(e)}")
+            return record
+
+        if "cough_classifier" in outputs:
+            probs = self._class_probabilities(outputs["cough_classifier"])
+            record["cough_probs"] = probs
+            record["cough_pred"] = int(np.argmax(probs))
+            record["cough_conf"] = max(probs)
+
+        if "breathing_analyzer" in outputs:
+            probs = self._class_probabilities(outputs["breathing_analyzer"])
+            record["breath_probs"] = probs
+            record["breath_pred"] = int(np.argmax(probs))
+
+        if "voice_analyzer" in outputs:
+            tremor, hoarseness, clarity = outputs["voice_analyzer"][0].float().tolist()
+            record["voice_tremor"] = tremor
+            record["voice_hoarseness"] = hoarseness
+            record["voice_clarity"] = clarity
+
+        if "mfcc" in features:
+            n_mfcc = min(len(features["mfcc"]), RECORD_DTYPE["mfcc"].shape[0])
+            record["mfcc"][:n_mfcc] = features["mfcc"][:n_mfcc]
+        record["centroid"] = features.get("spectral_centroid", np.nan)
+        record["tempo"] = features.get("tempo", np.nan)
+
+        return record
+
+    def _run_classifiers(self, audio: np.ndarray) -> Dict[str, torch.Tensor]:
+        """Run the audio trunks and classifier heads on the first MODEL_INPUT_SAMPLES of audio"""
+        heads = {name: model for name, model in self.models.items() if name != "emotion_detector"}
+        if not heads:
+            return {}
+
+        with torch.inference_mode():
+            # Truncate or zero-pad to the fixed classifier window
+            n_samples = min(audio.shape[0], MODEL_INPUT_SAMPLES)
+            self._host_input[:n_samples].copy_(torch.from_numpy(audio[:n_samples]))
+            self._host_input[n_samples:].zero_()
+
+            if self._ort_session is not None:
+                return self._run_onnx()
+
+            self._model_input[0, 0].copy_(self._host_input, non_blocking=True)
+            trunk_features = self._trunk_features(self.trunks, heads, self._model_input)
+            return self._run_heads(heads, trunk_features)
+
+    @staticmethod
+    def _class_probabilities(output: torch.Tensor) -> List[float]:
+        """Softmax over classifier logits, copied to the host in one transfer"""
+        return torch.nn.functional.softmax(output.float(), dim=1)[0].tolist()
@@ -0,0 +1,187 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("torchaudio")
+pytest.importorskip("librosa")
+pytest.importorskip("whisper")
+pytest.importorskip("transformers")
+
+from agents import audio_agent
+
+
+class LegacyClassifier(torch.nn.Module):
+    """Monolithic conv + FC classifier layout saved by the original cough/breathing loaders"""
+
+    def __init__(self, n_classes):
+        super(LegacyClassifier, self).__init__()
+        self.conv1 = torch.nn.Conv1d(1, 64, kernel_size=10, stride=5)
+        self.pool = torch.nn.MaxPool1d(2)
+        self.conv2 = torch.nn.Conv1d(64, 128, kernel_size=10, stride=5)
+        self.flatten = torch.nn.Flatten()
+        self.fc1 = torch.nn.Linear(128 * 99, 128)
+        self.fc2 = torch.nn.Linear(128, 64)
+        self.fc3 = torch.nn.Linear(64, n_classes)
+        self.relu = torch.nn.ReLU()
+
+    def forward(self, x):
+        x = self.pool(self.relu(self.conv1(x)))
+        x = self.pool(self.relu(self.conv2(x)))
+        x = self.flatten(x)
+        x = self.relu(self.fc1(x))
+        x = self.relu(self.fc2(x))
+        return self.fc3(x)
+
+
+class LegacyVoiceAnalyzer(torch.nn.Module):
+    """Monolithic conv + LSTM layout saved by the original voice analyzer loader"""
+
+    def __init__(self):
+        super(LegacyVoiceAnalyzer, self).__init__()
+        self.conv1 = torch.nn.Conv1d(1, 64, kernel_size=10, stride=5)
+        self.pool = torch.nn.MaxPool1d(2)
+        self.conv2 = torch.nn.Conv1d(64, 128, kernel_size=10, stride=5)
+        self.lstm = torch.nn.LSTM(128, 64, batch_first=True, bidirectional=True)
+        self.fc = torch.nn.Linear(128, 3)
+
+    def forward(self, x):
+        x = self.pool(torch.nn.functional.relu(self.conv1(x)))
+        x = self.pool(torch.nn.functional.relu(self.conv2(x)))
+        x, _ = self.lstm(x.permute(0, 2, 1))
+        return self.fc(x[:, -1, :])
+
+
+def make_agent(monkeypatch, model_configs):
+    # Avoid downloading Whisper and wav2vec2 weights
+    monkeypatch.setattr(audio_agent, "_get_whisper", lambda *args, **kwargs: object())
+    monkeypatch.setattr(audio_agent, "_get_emotion_pipeline", lambda *args, **kwargs: object())
+    return audio_agent.AudioAgent({
+        "use_gpu": False,
+        "compile_models": False,
+        "models": model_configs,
+    })
+
+
+def save_checkpoint(model, path):
+    torch.save(model.state_dict(), path)
+    return {"model_path": str(path)}
+
+
+def legacy_outputs(models, audio):
+    with torch.no_grad():
+        model_input = torch.from_numpy(audio).view(1, 1, -1)
+        return {name: model.eval()(model_input) for name, model in models.items()}
+
+
+def test_all_configured_models_are_loaded(monkeypatch, tmp_path):
+    model_configs = {
+        name: {"model_path": str(tmp_path / f"{name}.pt")}
+        for name in ["cough_classifier", "breathing_analyzer", "voice_analyzer", "emotion_detector"]
+    }
+    agent = make_agent(monkeypatch, model_configs)
+
+    assert set(agent.models) == set(model_configs)
+
+
+def test_legacy_checkpoints_match_monolithic_models(monkeypatch, tmp_path):
+    torch.manual_seed(0)
+    legacy = {"cough_classifier": LegacyClassifier(4), "voice_analyzer": LegacyVoiceAnalyzer()}
+    # Share conv weights so both heads run on one trunk
+    legacy["voice_analyzer"].conv1.load_state_dict(legacy["cough_classifier"].conv1.state_dict())
+    legacy["voice_analyzer"].conv2.load_state_dict(legacy["cough_classifier"].conv2.state_dict())
+
+    agent = make_agent(monkeypatch, {
+        name: save_checkpoint(model, tmp_path / f"{name}.pt") for name, model in legacy.items()
+    })
+    audio = np.random.default_rng(0).standard_normal(audio_agent.MODEL_INPUT_SAMPLES).astype(np.float32)
+
+    outputs = agent._run_classifiers(audio)
+    expected = legacy_outputs(legacy, audio)
+
+    assert len(agent.trunks) == 1
+    for name in legacy:
+        assert torch.allclose(outputs[name], expected[name], atol=1e-5)
+
+
+def test_checkpoints_with_different_conv_weights_get_their_own_trunk(monkeypatch, tmp_path):
+    torch.manual_seed(0)
+    legacy = {"cough_classifier": LegacyClassifier(4), "breathing_analyzer": LegacyClassifier(5)}
+
+    agent = make_agent(monkeypatch, {
+        name: save_checkpoint(model, tmp_path / f"{name}.pt") for name, model in legacy.items()
+    })
+    audio = np.random.default_rng(1).standard_normal(audio_agent.MODEL_INPUT_SAMPLES).astype(np.float32)
+
+    outputs = agent._run_classifiers(audio)
+    expected = legacy_outputs(legacy, audio)
+
+    assert set(agent.models) == set(legacy)
+    assert len(agent.trunks) == 2
+    assert agent.head_trunks["cough_classifier"] != agent.head_trunks["breathing_analyzer"]
+    for name in legacy:
+        assert torch.allclose(outputs[name], expected[name], atol=1e-5)
+
+
+def test_analyze_to_record_marks_missing_values(monkeypatch, tmp_path):
+    agent = make_agent(monkeypatch, {})
+
+    record = agent.analyze_to_record(str(tmp_path / "missing.wav"))
+
+    assert record["cough_pred"] == audio_agent.NO_PREDICTION
+    assert record["breath_pred"] == audio_agent.NO_PREDICTION
+    for name in audio_agent.RECORD_DTYPE.names:
+        if audio_agent.RECORD_DTYPE[name].base.kind == "f":
+            assert np.isnan(record[name]).all(), name
+
+
+def test_analyze_to_record_fills_computed_features(monkeypatch):
+    agent = make_agent(monkeypatch, {})
+    tone = np.sin(2 * np.pi * 440 * np.arange(16000) / 16000).astype(np.float32)
+    monkeypatch.setattr(agent, "preprocess_audio", lambda audio_path: tone)
+
+    record = agent.analyze_to_record("tone.wav")
+
+    assert np.isfinite(record["mfcc"]).all()
+    assert np.isfinite(record["centroid"])
+    # Tempo is disabled by default, no classifiers are loaded
+    assert np.isnan(record["tempo"])
+    assert record["cough_pred"] == audio_agent.NO_PREDICTION
+
+
+def test_spectral_features_match_librosa(monkeypatch):
+    import librosa
+
+    agent = make_agent(monkeypatch, {})
+    t = np.arange(16000) / 16000
+    tone = (0.5 * np.sin(2 * np.pi * 440 * t) + 0.25 * np.sin(2 * np.pi * 1320 * t)).astype(np.float32)
+
+    features = agent.extract_features(tone)
+
+    expected_mfcc = librosa.feature.mfcc(y=tone, sr=16000, n_mfcc=13).mean(axis=1)
+    expected_centroid = librosa.feature.spectral_centroid(y=tone, sr=16000).mean()
+    np.testing.assert_allclose(features["mfcc"], expected_mfcc, rtol=1e-3, atol=1e-2)
+    np.testing.assert_allclose(features["spectral_centroid"], expected_centroid, rtol=1e-3)
+
+
+def click_train(bpm, seconds=10, sample_rate=16000):
+    clicks = np.zeros(sample_rate * seconds, dtype=np.float32)
+    click = np.hanning(160) * np.sin(2 * np.pi * 1000 * np.arange(160) / sample_rate)
+    for start in range(0, len(clicks) - len(click), int(round(sample_rate * 60 / bpm))):
+        clicks[start:start + len(click)] = click
+    return clicks
+
+
+def test_tempo_of_click_train(monkeypatch):
+    agent = make_agent(monkeypatch, {})
+    agent.config["extract_tempo"] = True
+
+    tempo = agent.extract_features(click_train(120))["tempo"]
+
+    assert abs(tempo - 120) < 3
+
+
+def test_tempo_of_too_short_clip_is_zero(monkeypatch):
+    agent = make_agent(monkeypatch, {})
+    agent.config["extract_tempo"] = True
+
+    assert agent.extract_features(np.zeros(2000, dtype=np.float32))["tempo"] == 0.0